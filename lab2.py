@@ -1,26 +1,98 @@
 import hashlib
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-hash_object = input("Введите строку с вашим иин: ")
+CHUNK = 30_000 # сколько nonce проверяет один воркер за задачу (кратно 10)
+DIGITS = [str(d).encode("utf-8") for d in range(10)]
+# Порог для k hex-нулей: первые 8 байт дайджеста как big-endian число < 2**(64-4k).
+# Байтовые строки одной длины сравниваются так же, как эти числа, поэтому на промахе
+# сравниваем bytes напрямую, без int.from_bytes (проверяется до 16 hex-нулей).
+THRESH = [b""] + [(1 << (64 - 4 * k)).to_bytes(8, "big") for k in range(1, 17)]
 
-Invalid_zero_count = True
 
-while Invalid_zero_count:
-    Zero_max = int(input("Введите до скольки 0 вы хотите искать, от 1 до 5:"))
-    if 1 <= Zero_max <= 5:
-        Invalid_zero_count = False
+def search_chunk(prefix_data, start, min_k, max_k):
+    """
+    Проходит nonce из [start, start + CHUNK) один раз и возвращает "рекорды":
+    список (nonce, число ведущих hex-нулей) — первый nonce с >= min_k нулями,
+    затем первый с большим числом нулей и т.д., пока не наберётся max_k.
+    """
+    # префикс "иин+" одинаковый для всех попыток — хешируем его один раз,
+    # дальше копируем состояние и докидываем только nonce
+    base = hashlib.sha256(prefix_data)
+    from_bytes = int.from_bytes
+    hits = []
+    k = min_k
+    thresh = THRESH[k]
 
-for k in range(1, Zero_max + 1):
-    prefix = "0" * k
-    attempts =  0 # количество попыток
-    number = 0 
+    # nonce перебираются пачками по 10: у них общая "голова" str(number // 10),
+    # её кодируем и докидываем один раз, а на каждую попытку добавляем одну цифру
+    for head in range(start // 10, (start + CHUNK) // 10):
+        head_state = base.copy()
+        if head:
+            head_state.update(str(head).encode("utf-8"))
+        # сам sha256 считает OpenSSL (hashlib.sha256 == openssl_sha256), который на
+        # CPU с SHA-NI сам выбирает аппаратные инструкции — свой SHA-NI код не нужен
+        for d, tail in enumerate(DIGITS):
+            h = head_state.copy()
+            h.update(tail)
+            word = h.digest()[:8]
 
-while True:
-    final_hash_object = hash_object + "+" + str(number)
-    hash_result = hashlib.sha256(final_hash_object.encode("utf-8")).hexdigest()
-    attempts += 1
+            if word < thresh:
+                # число нулей считаем только на попадании
+                zeros = (64 - from_bytes(word, "big").bit_length()) // 4
+                hits.append((head * 10 + d, zeros))
+                k = zeros + 1
+                if k > max_k:
+                    return hits
+                thresh = THRESH[k]
+    return hits
 
-    if hash_result.startswith(prefix):
-        print(f"k={k} | attempts={attempts} | nonce={number} | input={final_hash_object} | sha256={hash_result}")
-        break                       # нашли для этого k -> выходим из while и пойдём к k+1
-    else:
-        number += 1  
\ No newline at end of file
+
+def find_nonces(pool, workers, prefix_data, zero_max):
+    """
+    Один проход по nonce для всех сложностей сразу: хеш с 3 нулями подходит
+    и для k=1, k=2. Выдаёт (k, nonce) для k = 1..zero_max по мере нахождения.
+    """
+    # чанки раздаются по порядку и результаты забираются тоже по порядку,
+    # поэтому найденный nonce — минимальный, как при последовательном переборе
+    next_k = 1
+    starts = itertools.count(0, CHUNK)
+    pending = deque(pool.submit(search_chunk, prefix_data, next(starts), next_k, zero_max) for _ in range(workers * 2))
+    while next_k <= zero_max:
+        for number, zeros in pending.popleft().result():
+            while next_k <= min(zeros, zero_max):
+                yield next_k, number
+                next_k += 1
+        pending.append(pool.submit(search_chunk, prefix_data, next(starts), next_k, zero_max))
+    for f in pending:
+        f.cancel()
+
+
+def read_zero_max():
+    while True:
+        answer = input("Введите до скольки 0 вы хотите искать, от 1 до 5:")
+        answer = answer.strip()
+        # isdecimal, а не isdigit: isdigit пропускает "²", на котором int() падает
+        if answer.isdecimal() and 1 <= int(answer) <= 5:
+            return int(answer)
+
+
+def main():
+    hash_object = input("Введите строку с вашим иин: ")
+    Zero_max = read_zero_max()
+
+    prefix_data = (hash_object + "+").encode("utf-8")
+    workers = os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for k, number in find_nonces(pool, workers, prefix_data, Zero_max):
+            attempts = number + 1 # количество попыток (nonce перебираются с 0)
+            final_hash_object = hash_object + "+" + str(number)
+            hash_result = hashlib.sha256(final_hash_object.encode("utf-8")).hexdigest()
+            print(f"k={k} | attempts={attempts} | nonce={number} | input={final_hash_object} | sha256={hash_result}")
+
+
+if __name__ == "__main__":
+    main()
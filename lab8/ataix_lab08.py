@@ -7,7 +7,7 @@ ataix_lab08.py — Автоматизация ЛР для ATAIX.
 - Читает баланс USDT из /api/user/balances/{currency}, поле result.available
 - Загружает /api/symbols, строго ищет запись по symbol==PAIR (например, TRX/USDT)
 - Получает цену: bid/last/price из /api/symbols, иначе берет top bid из /api/cmc/v1/orderbook/{pair}
-- Считает 3 лимитных BUY (-2%, -5%, -8%) ИЛИ одну покупку, если средств мало
+- Считает лимитные BUY по лесенке BUY_LADDER (-2%, -5%, -8%) ИЛИ одну покупку, если средств мало
 - Округляет price по pricePrecision, quantity по lotSize (floor)
 - Пропускает слишком маленькие заявки (проверки: lotSize, minQty, minNotional)
 - side строго в нижнем регистре ('buy'/'sell'), type='limit'
@@ -20,66 +20,155 @@ ataix_lab08.py — Автоматизация ЛР для ATAIX.
   python ataix_lab08.py --api-key ABC... --symbol TRX/USDT --usdt-amount 1.85 --out orders.json
 """
 import argparse
+import functools
 import time
-import json
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_DOWN
 from typing import Optional, Dict, Any, Tuple
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ====== Константы ======
 BASE_URL = "https://api.ataix.kz"
 SAVE_FILE_DEFAULT = "orders.json"
 REQUEST_TIMEOUT = 15  # seconds
-RETRY_DELAY = 0.5
+SYMBOLS_TTL = 30  # seconds, сколько переиспользуем ответ /api/symbols
+BUY_LADDER = (0.98, 0.95, 0.92)  # цены buy-заявок относительно best bid (-2%, -5%, -8%)
+MAX_PARALLEL_REQUESTS = 8  # не больше, чем соединений в пуле сессии (pool_maxsize)
+
+# Повторы с экспоненциальной паузой на сетевые сбои и 429/5xx. urllib3 делает первый
+# повтор сразу, дальше пауза backoff_factor * 2**(n-1): при 0.3 это 0, 0.6, 1.2 с.
+# POST (создание ордера) повторяется только при ошибке соединения — запрос тогда
+# точно не дошёл; повтор после ошибки чтения или 5xx мог бы выставить ордер дважды.
+RETRY = Retry(total=3, connect=3, read=3, backoff_factor=0.3,
+              status_forcelist=(429, 500, 502, 503, 504),
+              allowed_methods=frozenset(["GET", "DELETE"]),
+              raise_on_status=False)
+
+# Одна сессия на весь запуск: keep-alive переиспользует TCP+TLS соединение
+# с api.ataix.kz вместо нового рукопожатия на каждый вызов
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_PARALLEL_REQUESTS,
+                                      max_retries=RETRY))
+SESSION.headers.update({"Accept-Encoding": "gzip"})
+
+# Эндпоинты, которым ключ не нужен — заголовок авторизации на них не отправляем
+PUBLIC_PATHS = ("/api/symbols", "/api/cmc/v1/orderbook/")
+
+# Индекс варианта заголовка авторизации в _auth_headers(), который принял сервер.
+# Определяется при первом успешном (2xx) вызове с ключом, дальше шлём только его.
+# Храним индекс, а не сам словарь: заголовок всегда строится из текущего api_key.
+_AUTH_VARIANT_INDEX: Optional[int] = None
 
 # ====== HTTP / Вспомогательное ======
+@functools.lru_cache(maxsize=8)
+def _auth_headers(api_key: str) -> Tuple[Dict[str, str], ...]:
+    """
+    Популярные варианты передачи API-ключа, в порядке перебора.
+    Словари создаются один раз на ключ и переиспользуются — их нельзя изменять.
+    """
+    return (
+        {"X-API-KEY": api_key},
+        {"Authorization": f"Bearer {api_key}"},
+        {"api_key": api_key},
+        {"Api-Key": api_key},
+    )
+
+def _send(method: str, url: str, headers: Dict[str, str], json_body=None, params=None) -> Optional[requests.Response]:
+    try:
+        return SESSION.request(method, url, headers=headers, json=json_body, params=params, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        # повторы уже сделал RETRY внутри адаптера
+        print(f"[WARN] Сетевая ошибка {method} {url}: {e}")
+        return None
+
 def try_request(method: str, path: str, api_key: Optional[str], json_body=None, params=None, extra_headers=None) -> Tuple[Optional[requests.Response], Dict[str, str]]:
     """
-    Универсальный HTTP-вызов с перебором популярных вариантов авторизации.
+    Универсальный HTTP-вызов.
+    Публичные эндпоинты вызываются без ключа; для остальных при первом вызове
+    перебираются популярные варианты авторизации (следующий — только после 401/403),
+    и вариант, получивший ответ 2xx, запоминается в _AUTH_VARIANT_INDEX.
     Возвращает (response, headers_used).
     """
+    global _AUTH_VARIANT_INDEX
+
+    method = method.upper()
+    if method not in ("GET", "POST", "DELETE"):
+        raise ValueError(f"Unsupported method: {method}")
     url = BASE_URL.rstrip("/") + "/" + path.lstrip("/")
-    base_extra = (extra_headers or {}).copy()
-
-    headers_variants = []
-    if api_key:
-        headers_variants.append({**base_extra, "X-API-KEY": api_key})
-        headers_variants.append({**base_extra, "Authorization": f"Bearer {api_key}"})
-        headers_variants.append({**base_extra, "api_key": api_key})
-        headers_variants.append({**base_extra, "Api-Key": api_key})
-    # последний вариант — без ключа (для публичных эндпоинтов)
-    headers_variants.append({**base_extra})
-
-    for headers in headers_variants:
-        try:
-            if method.upper() == "GET":
-                resp = requests.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
-            elif method.upper() == "POST":
-                resp = requests.post(url, headers=headers, json=json_body, params=params, timeout=REQUEST_TIMEOUT)
-            elif method.upper() == "DELETE":
-                resp = requests.delete(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-        except requests.RequestException as e:
-            print(f"[WARN] Сетевая ошибка {method} {url}: {e}")
-            time.sleep(RETRY_DELAY)
+
+    if not api_key or path.startswith(PUBLIC_PATHS):
+        base_extra = (extra_headers or {}).copy()
+        return _send(method, url, base_extra, json_body, params), base_extra
+
+    # без extra_headers (обычный случай) шлём готовые словари как есть, без слияния
+    variants = _auth_headers(api_key)
+    if _AUTH_VARIANT_INDEX is not None:
+        variant = variants[_AUTH_VARIANT_INDEX]
+        headers = {**extra_headers, **variant} if extra_headers else variant
+        return _send(method, url, headers, json_body, params), headers
+
+    resp, headers = None, {}
+    for idx, variant in enumerate(variants):
+        headers = {**extra_headers, **variant} if extra_headers else variant
+        resp = _send(method, url, headers, json_body, params)
+        if resp is None:
+            # повторы уже исчерпаны адаптером — сеть недоступна, другой заголовок не поможет
+            return None, {}
+        if resp.status_code in (401, 403):
             continue
+        # 404/429/5xx ничего не говорят о заголовке — отдаём ответ, но вариант не закрепляем
+        if resp.ok:
+            _AUTH_VARIANT_INDEX = idx
         return resp, headers
-    return None, {}
+    # ни один вариант не принят — отдаём последний ответ (401/403), вызывающий разберётся
+    return resp, headers
+
+def order_key(entry: Dict[str, Any], orders: Dict[str, Any]) -> str:
+    """
+    Ключ записи в saved["orders"]: order_id, а если его нет — свободный tmp-N.
+    """
+    if entry.get("order_id"):
+        return str(entry["order_id"])
+    n = len(orders)
+    while f"tmp-{n}" in orders:
+        n += 1
+    return f"tmp-{n}"
 
 def load_saved(filename: str) -> Dict[str, Any]:
+    """
+    Читает сохранённое состояние. Ордера хранятся как {order_id: entry};
+    старый формат (список) конвертируется при чтении.
+    """
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(filename, "rb") as f:
+            data = orjson.loads(f.read())
     except FileNotFoundError:
-        return {"orders": []}
+        return {"orders": {}}
     except Exception as e:
         print(f"[ERROR] Не удалось прочитать {filename}: {e}")
-        return {"orders": []}
+        return {"orders": {}}
+
+    if isinstance(data.get("orders"), list):
+        orders = {}
+        for o in data["orders"]:
+            orders[order_key(o, orders)] = o
+        data["orders"] = orders
+    return data
 
 def save_saved(filename: str, data: Dict[str, Any]):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """
+    Пишет во временный файл и атомарно подменяет им основной,
+    чтобы прерванная запись не оставила битый orders.json.
+    """
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    os.replace(tmp, filename)
 
 # ====== Обёртки API ======
 def get_balance(api_key: str, currency: str = "USDT") -> Dict[str, Any]:
@@ -95,7 +184,7 @@ def get_balance(api_key: str, currency: str = "USDT") -> Dict[str, Any]:
         raise PermissionError(f"Permission denied when requesting balance (HTTP {resp.status_code}). Проверь разрешение DATA у ключа.")
     if not resp.ok:
         raise RuntimeError(f"Error fetching balance: {resp.status_code} {resp.text}")
-    return resp.json()
+    return orjson.loads(resp.content)
 
 def extract_available_usdt(balance_json: Dict[str, Any], fallback: float) -> float:
     """
@@ -118,9 +207,10 @@ def extract_available_usdt(balance_json: Dict[str, Any], fallback: float) -> flo
     print("[WARN] Не удалось автоматически прочитать available из ответа баланса. Использую значение из --usdt-amount.")
     return float(fallback)
 
-def get_symbols(api_key: Optional[str]) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=1)
+def _fetch_symbols(api_key: Optional[str]) -> Tuple[Dict[str, Any], float]:
     """
-    /api/symbols — список символов c параметрами (pricePrecision, lotSize, minQty, minNotional и т.п.)
+    Сам запрос /api/symbols. Возвращает (symbols_json, время получения).
     """
     path = "/api/symbols"
     resp, _ = try_request("GET", path, api_key)
@@ -128,19 +218,41 @@ def get_symbols(api_key: Optional[str]) -> Dict[str, Any]:
         raise RuntimeError("Network error when requesting symbols")
     if not resp.ok:
         raise RuntimeError(f"Error fetching symbols: {resp.status_code} {resp.text}")
-    return resp.json()
+    return orjson.loads(resp.content), time.monotonic()
+
+def get_symbols(api_key: Optional[str]) -> Dict[str, Any]:
+    """
+    /api/symbols — список символов c параметрами (pricePrecision, lotSize, minQty, minNotional и т.п.)
+    Ответ кешируется на SYMBOLS_TTL секунд.
+    """
+    symbols_json, fetched_at = _fetch_symbols(api_key)
+    if time.monotonic() - fetched_at > SYMBOLS_TTL:
+        _fetch_symbols.cache_clear()
+        symbols_json, _ = _fetch_symbols(api_key)
+    return symbols_json
 
 def find_symbol_record(symbols_json: Dict[str, Any], pair: str) -> Dict[str, Any]:
     """
     Возвращает запись из result[], где symbol == pair (например, 'TRX/USDT').
+    Индекс {symbol: запись} строится при первом вызове и хранится в самом
+    symbols_json под ключом "_index" — закешированный ответ get_symbols
+    повторно не сканируется.
     """
-    entries = symbols_json.get("result") if isinstance(symbols_json, dict) else None
-    if not isinstance(entries, list):
-        raise RuntimeError("Неожиданный формат /api/symbols (ожидался {'result': [...]})")
-    for e in entries:
-        if isinstance(e, dict) and e.get("symbol") == pair:
-            return e
-    raise RuntimeError(f"Пара {pair} не найдена в /api/symbols")
+    idx = symbols_json.get("_index") if isinstance(symbols_json, dict) else None
+    if idx is None:
+        entries = symbols_json.get("result") if isinstance(symbols_json, dict) else None
+        if not isinstance(entries, list):
+            raise RuntimeError("Неожиданный формат /api/symbols (ожидался {'result': [...]})")
+        idx = {}
+        for e in entries:
+            # при повторе symbol побеждает первая запись — как при линейном поиске
+            if isinstance(e, dict) and "symbol" in e:
+                idx.setdefault(e["symbol"], e)
+        symbols_json["_index"] = idx
+    try:
+        return idx[pair]
+    except KeyError:
+        raise RuntimeError(f"Пара {pair} не найдена в /api/symbols") from None
 
 def get_symbol_limits(srec: Dict[str, Any]) -> Dict[str, float]:
     """
@@ -164,7 +276,7 @@ def get_public_best_bid(pair: str) -> float:
     resp, _ = try_request("GET", path, None)
     if resp is None or not resp.ok:
         raise RuntimeError(f"Не удалось получить публичный ордербук для {pair}: {None if resp is None else resp.text}")
-    data = resp.json()
+    data = orjson.loads(resp.content)
     res = data.get("result", {})
     bids = res.get("bids") or []
     if not bids:
@@ -176,13 +288,11 @@ def get_public_best_bid(pair: str) -> float:
         return float(top["price"])
     raise RuntimeError("Неожиданный формат bids[0] в публичном стакане")
 
-def find_best_bid_price(api_key: Optional[str], pair: str) -> float:
+def find_best_bid_price(srec: Dict[str, Any], pair: str) -> float:
     """
-    1) Пытается взять bid/last/price из /api/symbols для конкретного pair.
-    2) Если в /api/symbols цены нет — берёт bid из публичного ордербука.
+    1) Пытается взять bid/last/price из уже найденной записи /api/symbols для pair.
+    2) Если в записи цены нет — берёт bid из публичного ордербука.
     """
-    symbols = get_symbols(api_key)
-    srec = find_symbol_record(symbols, pair)
     for key in ("bid", "bestBid", "last", "price"):
         v = srec.get(key)
         if v is not None:
@@ -217,25 +327,26 @@ def place_order(api_key: str, symbol: str, side: str, price: float, quantity: fl
     Создание ордера: POST /api/orders
     - side в нижнем регистре ('buy'/'sell')
     - type='limit'
-    - price округляется по pricePrecision
+    - price округляется вниз по pricePrecision
     - quantity приводится к шагу lotSize (floor)
+    Считаем в Decimal, чтобы float-погрешность не давала лишних знаков
+    и биржа не отклоняла заявку.
     """
     path = "/api/orders"
 
     price_prec = int(srec.get("pricePrecision", 8))
-    lot_size = float(srec.get("lotSize", 0.00000001))
+    lot_size = Decimal(str(srec.get("lotSize", "0.00000001")))
 
-    p = float(f"{price:.{price_prec}f}")
-    steps = int(quantity / lot_size)
+    p = Decimal(str(price)).quantize(Decimal(1).scaleb(-price_prec), rounding=ROUND_DOWN)
+    steps = int(Decimal(str(quantity)) / lot_size)
     q = steps * lot_size
-    q = float(f"{q:.8f}")
 
     body = {
         "symbol": symbol,
         "side": side.lower(),      # ВАЖНО: нижний регистр
         "type": "limit",
-        "price": str(p),
-        "quantity": str(q)
+        "price": format(p, "f"),   # "f" — без экспоненты даже для 1E-8
+        "quantity": format(q, "f")
     }
 
     resp, _ = try_request("POST", path, api_key, json_body=body)
@@ -247,7 +358,7 @@ def place_order(api_key: str, symbol: str, side: str, price: float, quantity: fl
         raise RuntimeError(f"Order rejected {resp.status_code}: {resp.text}")
 
     try:
-        return resp.json()
+        return orjson.loads(resp.content)
     except Exception:
         return {"raw_text": resp.text}
 
@@ -268,11 +379,44 @@ def get_order_status(api_key: str, order_id: str) -> Dict[str, Any]:
             raise PermissionError(f"Permission denied when checking order {order_id}: {resp.status_code}")
         if resp.ok:
             try:
-                return resp.json()
+                return orjson.loads(resp.content)
             except:
                 return {"raw_text": resp.text}
     raise RuntimeError(f"Не удалось получить статус ордера {order_id}")
 
+def list_open_orders(api_key: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Все ордера пользователя одним запросом: GET /api/user/orders.
+    Возвращает {orderID: order}. Если список получить не удалось — пустой dict,
+    тогда статусы проверяются по одному через get_order_status.
+    """
+    resp, _ = try_request("GET", "/api/user/orders", api_key)
+    if resp is None:
+        print("[WARN] Не удалось получить список ордеров, проверяем по одному")
+        return {}
+    if resp.status_code in (401, 403):
+        raise PermissionError(f"Permission denied when listing orders: {resp.status_code}")
+    if not resp.ok:
+        print(f"[WARN] Список ордеров недоступен ({resp.status_code}), проверяем по одному")
+        return {}
+    try:
+        data = orjson.loads(resp.content)
+    except Exception:
+        return {}
+
+    res = data.get("result") if isinstance(data, dict) else data
+    if isinstance(res, dict):
+        res = res.get("orders") or res.get("items") or []
+    if not isinstance(res, list):
+        return {}
+
+    orders = {}
+    for o in res:
+        oid = extract_order_id(o)
+        if oid:
+            orders[oid] = o
+    return orders
+
 # ====== Отмена ордеров (опционально) ======
 def cancel_order(api_key: str, order_id: str) -> Dict[str, Any]:
     """
@@ -284,7 +428,7 @@ def cancel_order(api_key: str, order_id: str) -> Dict[str, Any]:
         resp, _ = try_request("DELETE", p, api_key)
         if resp is not None and resp.ok:
             try:
-                return resp.json()
+                return orjson.loads(resp.content)
             except:
                 return {"raw_text": resp.text}
         last_err = None if resp is None else resp.text
@@ -294,7 +438,7 @@ def cancel_all_new_buys(api_key: str, saved: Dict[str, Any]):
     """
     Отменяет все buy-ордера в статусах NEW/OPEN.
     """
-    for o in saved.get("orders", []):
+    for o in saved.get("orders", {}).values():
         if o.get("side") == "buy" and o.get("status") in (None, "NEW", "OPEN") and o.get("order_id"):
             try:
                 r = cancel_order(api_key, o["order_id"])
@@ -305,7 +449,11 @@ def cancel_all_new_buys(api_key: str, saved: Dict[str, Any]):
 # ====== Бизнес-логика ЛР ======
 def run_lab(api_key: str, pair: str, usdt_amount: float, out_file: str) -> Dict[str, Any]:
     print("[INFO] Получаем баланс USDT...")
-    bal_json = get_balance(api_key, "USDT")
+    # баланс и /api/symbols друг от друга не зависят — запрашиваем параллельно
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        bal_future = pool.submit(get_balance, api_key, "USDT")
+        symbols_future = pool.submit(get_symbols, api_key)
+    bal_json = bal_future.result()
     print("[INFO] Баланс (raw):", bal_json)
     available_usdt = extract_available_usdt(bal_json, fallback=usdt_amount)
     print(f"[INFO] Доступно USDT: {available_usdt}")
@@ -315,147 +463,167 @@ def run_lab(api_key: str, pair: str, usdt_amount: float, out_file: str) -> Dict[
         raise RuntimeError("Недостаточно USDT для выставления ордеров.")
 
     print(f"[INFO] Получаем параметры символа и цену для {pair} ...")
-    symbols = get_symbols(api_key)
+    symbols = symbols_future.result()
     srec = find_symbol_record(symbols, pair)
     limits = get_symbol_limits(srec)
-    best_bid = find_best_bid_price(api_key, pair)
+    best_bid = find_best_bid_price(srec, pair)
     print(f"[INFO] Лучшая цена покупки (best bid) для {pair}: {best_bid}")
 
-    # Логика распределения: 3 заявки или 1, если средств мало
-    deltas = [0.98, 0.95, 0.92]
-    per_order_usdt = use_usdt / 3.0
+    # Логика распределения: по заявке на каждую ступень BUY_LADDER или 1, если средств мало
+    deltas = BUY_LADDER
+    per_order_usdt = use_usdt / len(deltas)
     if per_order_usdt < limits["minNotional"]:
-        # слишком мало для трёх — поставим одну «консервативную» заявку
-        deltas = [0.98]
+        # слишком мало для всех — поставим одну «консервативную» заявку
+        deltas = BUY_LADDER[:1]
         per_order_usdt = use_usdt
-        print(f"[INFO] Недостаточно средств для 3 заявок. Переключаюсь на 1 заявку всей суммой: ~{per_order_usdt:.8f} USDT")
-
-    # Формируем кандидатов
-    to_place = []
-    for d in deltas:
-        price = best_bid * d
-        qty_raw = per_order_usdt / price
-
-        # Фильтры минимальных лимитов инструмента
-        if (qty_raw < limits["minQty"]) or (per_order_usdt < limits["minNotional"]):
+        print(f"[INFO] Недостаточно средств для {len(BUY_LADDER)} заявок. Переключаюсь на 1 заявку всей суммой: ~{per_order_usdt:.8f} USDT")
+
+    # Формируем кандидатов: сначала цены и количества по всей лесенке, потом маска
+    # по лимитам инструмента. Сумма на заявку у всех ступеней одна, поэтому
+    # minNotional проверяется один раз, а не на каждой ступени.
+    prices = [best_bid * d for d in deltas]
+    qtys = [per_order_usdt / price for price in prices]
+    notional_ok = per_order_usdt >= limits["minNotional"]
+    mask = [notional_ok and qty_raw >= limits["minQty"] for qty_raw in qtys]
+
+    for price, qty_raw, ok in zip(prices, qtys, mask):
+        if not ok:
             print(f"[SKIP] Слишком маленькая заявка: price≈{price:.10f}, qty≈{qty_raw:.10f}, "
                   f"usdt≈{per_order_usdt:.8f} (minQty={limits['minQty']}, minNotional={limits['minNotional']}). Пропускаю.")
-            continue
-
-        to_place.append((price, qty_raw))
+    to_place = [(price, qty_raw) for price, qty_raw, ok in zip(prices, qtys, mask) if ok]
 
     saved = load_saved(out_file)
     if "orders" not in saved:
-        saved["orders"] = []
+        saved["orders"] = {}
 
     # Если нужно освободить средства — включи строку ниже:
     #cancel_all_new_buys(api_key, saved)
 
     print(f"[INFO] Выставляем {len(to_place)} лимитных покупок для {pair} ...")
-    for price, qty in to_place:
-        try:
-            resp_json = place_order(api_key, pair, "buy", price, qty, srec)
-            order_id = extract_order_id(resp_json)
-
-            entry = {
-                "side": "buy",
-                "price": float(f"{price:.10f}"),
-                "quantity": float(f"{qty:.10f}"),
-                "pair": pair,
-                "order_id": order_id,
-                "status": "NEW",
-                "created_raw_response": resp_json,
-                "linked_sell_order": None,
-                "created_at": int(time.time())
-            }
-            saved["orders"].append(entry)
-            save_saved(out_file, saved)
-            print(f"[OK] Покупка выставлена. order_id={entry['order_id']} price={entry['price']} qty≈{entry['quantity']}")
-        except PermissionError:
-            raise
-        except Exception as e:
-            print(f"[ERROR] Не удалось выставить покупку: {e}")
-
-    print("[INFO] Сохраняем результаты в", out_file)
+    try:
+        for price, qty in to_place:
+            try:
+                resp_json = place_order(api_key, pair, "buy", price, qty, srec)
+                order_id = extract_order_id(resp_json)
+
+                entry = {
+                    "side": "buy",
+                    "price": float(f"{price:.10f}"),
+                    "quantity": float(f"{qty:.10f}"),
+                    "pair": pair,
+                    "order_id": order_id,
+                    "status": "NEW",
+                    "created_raw_response": resp_json,
+                    "linked_sell_order": None,
+                    "created_at": int(time.time())
+                }
+                saved["orders"][order_key(entry, saved["orders"])] = entry
+                print(f"[OK] Покупка выставлена. order_id={entry['order_id']} price={entry['price']} qty≈{entry['quantity']}")
+            except PermissionError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Не удалось выставить покупку: {e}")
+    finally:
+        # уже выставленные ордера не теряем, даже если цикл прервался (Ctrl+C, любая ошибка)
+        print("[INFO] Сохраняем результаты в", out_file)
+        save_saved(out_file, saved)
 
     # Один проход проверки статусов (для отчёта)
     print("[INFO] Проверяем статусы buy-ордеров (один проход)...")
-    for idx, entry in enumerate(saved["orders"]):
-        if entry["side"] != "buy":
-            continue
-        if entry.get("status") in ("FILLED", "CLOSED"):
-            continue
-        oid = entry.get("order_id")
-        if not oid:
-            print(f"[WARN] У ордера нет order_id, пропускаем: {entry.get('created_raw_response')}")
-            continue
-        try:
-            st = get_order_status(api_key, oid)
-            status = None
-            filled_amount = None
-            avg_price = None
-            if isinstance(st, dict):
-                status = st.get("status") or st.get("orderStatus")
-                avg_price = st.get("avgPrice") or st.get("averagePrice")
-                filled_amount = st.get("filledAmount") or st.get("filledQty") or st.get("filled")
-                if "result" in st and isinstance(st["result"], dict):
-                    status = st["result"].get("status") or status
-                    avg_price = st["result"].get("avgPrice") or avg_price
-                    filled_amount = st["result"].get("filledAmount") or filled_amount
-
-            norm = (status or "").lower()
-            if norm in ("filled", "done", "closed", "executed"):
-                entry["status"] = "FILLED"
-            elif norm in ("new", "open", "partially_filled", "partiallyfilled"):
-                entry["status"] = norm.upper()
-            else:
-                try:
-                    if filled_amount is not None and float(filled_amount) >= float(entry["quantity"]) - 1e-9:
-                        entry["status"] = "FILLED"
-                    else:
+    # один запрос на все ордера; по одному проверяем только те, которых нет в списке
+    try:
+        open_orders = list_open_orders(api_key)
+        # недостающие статусы запрашиваем параллельно, ответы (или ошибки) разбираем в цикле ниже
+        missing = [e["order_id"] for e in saved["orders"].values()
+                   if e["side"] == "buy" and e.get("status") not in ("FILLED", "CLOSED")
+                   and e.get("order_id") and e["order_id"] not in open_orders]
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as pool:
+            status_futures = {oid: pool.submit(get_order_status, api_key, oid) for oid in missing}
+
+        # копия списка: в цикле в saved["orders"] добавляются sell-ордера
+        for entry in list(saved["orders"].values()):
+            if entry["side"] != "buy":
+                continue
+            if entry.get("status") in ("FILLED", "CLOSED"):
+                continue
+            oid = entry.get("order_id")
+            if not oid:
+                print(f"[WARN] У ордера нет order_id, пропускаем: {entry.get('created_raw_response')}")
+                continue
+            try:
+                if oid in open_orders:
+                    # без "status" верхнего уровня: иначе при записи без status туда попал бы bool
+                    st = {"result": open_orders[oid]}
+                else:
+                    st = status_futures[oid].result()
+                status = None
+                filled_amount = None
+                avg_price = None
+                if isinstance(st, dict):
+                    status = st.get("status") or st.get("orderStatus")
+                    avg_price = st.get("avgPrice") or st.get("averagePrice")
+                    filled_amount = st.get("filledAmount") or st.get("filledQty") or st.get("filled")
+                    if "result" in st and isinstance(st["result"], dict):
+                        status = st["result"].get("status") or status
+                        avg_price = st["result"].get("avgPrice") or avg_price
+                        filled_amount = st["result"].get("filledAmount") or filled_amount
+
+                norm = (status or "").lower()
+                if norm in ("filled", "done", "closed", "executed"):
+                    entry["status"] = "FILLED"
+                elif norm in ("new", "open", "partially_filled", "partiallyfilled"):
+                    entry["status"] = norm.upper()
+                else:
+                    try:
+                        if filled_amount is not None and float(filled_amount) >= float(entry["quantity"]) - 1e-9:
+                            entry["status"] = "FILLED"
+                        else:
+                            entry["status"] = "NEW"
+                    except:
                         entry["status"] = "NEW"
-                except:
-                    entry["status"] = "NEW"
-
-            entry["status_raw_response"] = st
-            saved["orders"][idx] = entry
-            save_saved(out_file, saved)
-            print(f"[INFO] Order {oid} status -> {entry['status']}")
 
-            # Если покупка FILLED — создаём продажу +2%
-            if entry["status"] == "FILLED" and not entry.get("linked_sell_order"):
-                bought_price = float(avg_price) if avg_price else float(entry["price"])
-                sell_price = bought_price * 1.02
-                sell_qty = float(entry["quantity"])
-
-                try:
-                    sell_resp = place_order(api_key, pair, "sell", sell_price, sell_qty, srec)
-                    sell_id = extract_order_id(sell_resp)
-
-                    sell_entry = {
-                        "side": "sell",
-                        "price": float(f"{sell_price:.10f}"),
-                        "quantity": float(f"{sell_qty:.10f}"),
-                        "pair": pair,
-                        "order_id": sell_id,
-                        "status": "NEW",
-                        "created_raw_response": sell_resp,
-                        "linked_buy_order": entry.get("order_id"),
-                        "created_at": int(time.time())
-                    }
-                    saved["orders"].append(sell_entry)
-                    entry["linked_sell_order"] = sell_entry["order_id"]
-                    saved["orders"][idx] = entry
-                    save_saved(out_file, saved)
-                    print(f"[OK] Создан ордер на продажу: order_id={sell_entry['order_id']} price={sell_entry['price']}")
-                except Exception as e:
-                    print(f"[ERROR] Не удалось создать продажу: {e}")
-
-        except PermissionError:
-            raise
-        except Exception as e:
-            print(f"[ERROR] Ошибка при проверке статуса ордера {oid}: {e}")
+                entry["status_raw_response"] = st
+                print(f"[INFO] Order {oid} status -> {entry['status']}")
+
+                # Если покупка FILLED — создаём продажу +2%
+                linked = entry.get("linked_sell_order")
+                if linked and linked not in saved["orders"]:
+                    print(f"[WARN] Связанный sell-ордер {linked} для {oid} не найден в {out_file}")
+                if entry["status"] == "FILLED" and not linked:
+                    bought_price = float(avg_price) if avg_price else float(entry["price"])
+                    sell_price = bought_price * 1.02
+                    sell_qty = float(entry["quantity"])
+
+                    try:
+                        sell_resp = place_order(api_key, pair, "sell", sell_price, sell_qty, srec)
+                        sell_id = extract_order_id(sell_resp)
+
+                        sell_entry = {
+                            "side": "sell",
+                            "price": float(f"{sell_price:.10f}"),
+                            "quantity": float(f"{sell_qty:.10f}"),
+                            "pair": pair,
+                            "order_id": sell_id,
+                            "status": "NEW",
+                            "created_raw_response": sell_resp,
+                            "linked_buy_order": entry.get("order_id"),
+                            "created_at": int(time.time())
+                        }
+                        sell_key = order_key(sell_entry, saved["orders"])
+                        saved["orders"][sell_key] = sell_entry
+                        entry["linked_sell_order"] = sell_key
+                        print(f"[OK] Создан ордер на продажу: order_id={sell_entry['order_id']} price={sell_entry['price']}")
+                    except Exception as e:
+                        print(f"[ERROR] Не удалось создать продажу: {e}")
+
+            except PermissionError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Ошибка при проверке статуса ордера {oid}: {e}")
 
+    finally:
+        # что бы ни прервало проход — обновлённые статусы и созданные sell не теряем
+        save_saved(out_file, saved)
     print("[DONE] Один проход проверки завершён. Для постоянного мониторинга — запускайте периодически (или в цикле).")
     return saved
 
@@ -470,7 +638,7 @@ def main():
 
     try:
         result = run_lab(args.api_key, args.symbol, args.usdt_amount, args.out)
-        print("[RESULT] Сохранённые записи:", json.dumps(result, ensure_ascii=False, indent=2)[:2000])
+        print("[RESULT] Сохранённые записи:", orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")[:2000])
     except PermissionError as e:
         print("[FATAL] Permission error:", e)
         print("Подсказка: добавьте разрешение DATA для вашего API-ключа в кабинете ATAIX.")
@@ -1,12 +1,17 @@
-import json, os
+import orjson, os
 
 PATH = "orders.json"
 
-with open(PATH, "r", encoding="utf-8") as f:
-    data = json.load(f)
+with open(PATH, "rb") as f:
+    data = orjson.loads(f.read())
+
+orders = data.get("orders", {})
+# новый формат — {order_id: entry}, старый — список записей
+items = list(orders.items()) if isinstance(orders, dict) else list(enumerate(orders))
 
 changed = 0
-for o in data.get("orders", []):
+renamed = {}  # tmp-ключ -> настоящий order_id
+for key, o in items:
     if not o.get("order_id"):
         # orderID может лежать здесь:
         rid = None
@@ -18,10 +23,31 @@ for o in data.get("orders", []):
             if not rid and isinstance(cr.get("result"), dict):
                 rid = cr["result"].get("orderID") or cr["result"].get("orderId")
         if rid:
-            o["order_id"] = str(rid)
+            rid = str(rid)
+            if isinstance(orders, dict) and key != rid and rid in orders:
+                # под этим order_id уже есть другая запись — не перетираем её
+                print(f"[WARN] {key}: order_id {rid} уже занят другой записью, пропускаю")
+                continue
+            o["order_id"] = rid
             changed += 1
+            # временный ключ tmp-N заменяем настоящим order_id
+            if isinstance(orders, dict) and key != rid:
+                del orders[key]
+                orders[rid] = o
+                renamed[key] = rid
 
-with open(PATH, "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+# ссылки buy <-> sell хранят ключи записей — переводим их на новые ключи
+for o in (orders.values() if isinstance(orders, dict) else orders):
+    for link in ("linked_sell_order", "linked_buy_order"):
+        if o.get(link) in renamed:
+            o[link] = renamed[o[link]]
 
-print(f"Patched orders: {changed}")
+if changed == 0:
+    # повторный запуск ничего не меняет — файл не переписываем
+    print("Nothing to patch")
+else:
+    # пишем во временный файл и подменяем, чтобы не оставить битый orders.json
+    with open(PATH + ".tmp", "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    os.replace(PATH + ".tmp", PATH)
+    print(f"Patched orders: {changed}")